@@ -0,0 +1,26 @@
+"""Helpers shared by the Kippy test modules."""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import pytest
+
+from custom_components.kippy.const import OPERATING_STATUS, OPERATING_STATUS_MAP
+
+# Applied per async test rather than through pytestmark: pytest-asyncio warns
+# once for every synchronous test that carries the asyncio mark.
+SESSION_LOOP = pytest.mark.asyncio(loop_scope="session")
+
+ENERGY_SAVING_LABEL = OPERATING_STATUS_MAP[OPERATING_STATUS.ENERGY_SAVING]
+IDLE_LABEL = OPERATING_STATUS_MAP[OPERATING_STATUS.IDLE]
+LIVE_LABEL = OPERATING_STATUS_MAP[OPERATING_STATUS.LIVE]
+
+
+def remove_listener() -> None:
+    """Do nothing; returned as the unsubscribe callback of coordinator doubles."""
+
+
+def add_listener(_update_callback: Callable[[], None]) -> Callable[[], None]:
+    """Accept a listener registration without keeping the callback."""
+    return remove_listener
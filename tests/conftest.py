@@ -0,0 +1,79 @@
+"""Shared fixtures for the Kippy test suite."""
+
+from __future__ import annotations
+
+from typing import Any, Callable
+from unittest.mock import Mock
+
+import pytest
+
+from custom_components.kippy.api import KippyApi
+from custom_components.kippy.coordinator import (
+    KippyDataUpdateCoordinator,
+    KippyMapDataUpdateCoordinator,
+)
+from tests.common import add_listener, remove_listener
+
+# Public attributes assigned in ``__init__`` rather than on the class, so they
+# are invisible to ``spec_set`` unless listed explicitly.
+_DATA_UPDATE_ATTRS = ("config_entry", "data", "hass", "last_update_success")
+_COORDINATOR_SPECS: dict[type, list[str]] = {
+    KippyDataUpdateCoordinator: [
+        *dir(KippyDataUpdateCoordinator),
+        *_DATA_UPDATE_ATTRS,
+        "api",
+    ],
+    KippyMapDataUpdateCoordinator: [
+        *dir(KippyMapDataUpdateCoordinator),
+        *_DATA_UPDATE_ATTRS,
+        "api",
+        "idle_refresh",
+        "ignore_lbs",
+        "kippy_id",
+        "live_refresh",
+    ],
+}
+
+
+@pytest.fixture(name="capture_listener")
+def _capture_listener() -> Callable[[Any], Callable[..., Any]]:
+    """Return a factory for ``async_add_listener`` side effects.
+
+    The produced side effect stores the registered callback on the mock as
+    ``listener`` so tests can trigger coordinator updates by hand.
+    """
+
+    def _factory(mock: Any) -> Callable[..., Any]:
+        def _add(callback: Callable[[], None]) -> Callable[[], None]:
+            mock.listener = callback
+            return remove_listener
+
+        return _add
+
+    return _factory
+
+
+@pytest.fixture(name="make_coordinator")
+def _make_coordinator() -> Callable[..., Mock]:
+    """Return a factory for coordinator doubles restricted to real attributes.
+
+    ``spec_set`` rejects misspelt attributes on both read and write, and the
+    ``api`` double is specced on :class:`KippyApi` so its coroutine methods are
+    ``AsyncMock`` instances. Listener registration is a plain function since
+    no test inspects it. Extra keyword arguments are set as attributes, e.g.
+    ``kippy_id`` or ``ignore_lbs`` on map coordinators.
+    """
+
+    def _factory(
+        data: Any = None, spec: type = KippyDataUpdateCoordinator, **attrs: Any
+    ) -> Mock:
+        coordinator = Mock(spec_set=_COORDINATOR_SPECS[spec])
+        coordinator.data = data
+        coordinator.api = Mock(spec=KippyApi)
+        coordinator.last_update_success = True
+        coordinator.async_add_listener = add_listener
+        for name, value in attrs.items():
+            setattr(coordinator, name, value)
+        return coordinator
+
+    return _factory
@@ -2,22 +2,25 @@
 
 """Tests for Kippy sensor entities."""
 
+from collections import Counter
 from datetime import datetime, timezone
-from unittest.mock import AsyncMock, MagicMock
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable
+from unittest.mock import MagicMock, Mock
 
 import pytest
 from homeassistant.const import UnitOfLength, UnitOfTime
+from homeassistant.core import HomeAssistant
 from homeassistant.util.location import distance as location_distance
 from homeassistant.util.unit_conversion import DistanceConverter, DurationConverter
 
 from custom_components.kippy.const import (
     DOMAIN,
     LABEL_EXPIRED,
-    OPERATING_STATUS,
-    OPERATING_STATUS_MAP,
     OPERATING_STATUS_STARTING_LIVE,
     PET_KIND_TO_TYPE,
 )
+from custom_components.kippy.coordinator import KippyDataUpdateCoordinator
 from custom_components.kippy.sensor import (
     KippyBatterySensor,
     KippyEnergySavingStatusSensor,
@@ -39,159 +42,168 @@ from custom_components.kippy.sensor import (
     async_setup_entry,
 )
 from custom_components.kippy.switch import KippyEnergySavingSwitch
+from tests.common import ENERGY_SAVING_LABEL, IDLE_LABEL, SESSION_LOOP, add_listener
+
+_EXPIRED_2D_IN_HOURS = DurationConverter.convert(2, UnitOfTime.DAYS, UnitOfTime.HOURS)
+_RUN_60M_IN_HOURS = DurationConverter.convert(60, UnitOfTime.MINUTES, UnitOfTime.HOURS)
+_DT_1, _DT_2, _DT_3 = (datetime.fromtimestamp(ts, timezone.utc) for ts in (1, 2, 3))
+_NEXT_CONTACT_5H = datetime.fromtimestamp(10 + 5 * 3600, timezone.utc)
+_NEXT_CONTACT_6H = datetime.fromtimestamp(10 + 6 * 3600, timezone.utc)
+_DIST_0_0_0_1_M = location_distance(0, 0, 0, 1)
+_DIST_0_0_0_1_MI = DistanceConverter.convert(
+    _DIST_0_0_0_1_M, UnitOfLength.METERS, UnitOfLength.MILES
+)
 
 
-@pytest.mark.asyncio
-async def test_expired_days_sensor_returns_expired() -> None:
-    """Ensure non-negative days report as 'Expired'."""
-    pet = {"petID": "1", "expired_days": 0}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock()
-    sensor = KippyExpiredDaysSensor(coordinator, pet)
-    hass = MagicMock()
-    hass.config.units.get_converted_unit.return_value = None
-    sensor.hass = hass
+def _coordinator(data: Any = None, activities: Any = None) -> SimpleNamespace:
+    """Return a plain coordinator double for tests that never inspect calls."""
+
+    coordinator = SimpleNamespace(
+        data=data,
+        activities=activities,
+        last_update_success=True,
+        async_add_listener=add_listener,
+    )
+    coordinator.get_activities = lambda _pet_id: coordinator.activities
+    return coordinator
+
+
+def _hass(
+    length_unit: str = UnitOfLength.KILOMETERS, duration_unit: str | None = None
+) -> SimpleNamespace:
+    """Return a hass double homed at 0,0 with the given unit preferences."""
+
+    units = SimpleNamespace(
+        length_unit=length_unit,
+        get_converted_unit=lambda _device_class, _unit: duration_unit,
+    )
+    return SimpleNamespace(config=SimpleNamespace(units=units, latitude=0, longitude=0))
+
+
+@pytest.fixture(name="hass_metric", scope="module")
+def _hass_metric() -> SimpleNamespace:
+    """Return a metric hass double with no duration overrides."""
+
+    return _hass()
+
+
+@pytest.fixture(name="hass_imperial", scope="module")
+def _hass_imperial() -> SimpleNamespace:
+    """Return an imperial hass double with no duration overrides."""
 
-    assert sensor.native_value == LABEL_EXPIRED
+    return _hass(UnitOfLength.MILES)
 
-    pet["expired_days"] = 5
-    assert sensor.native_value == LABEL_EXPIRED
 
+@pytest.fixture(name="today_utc")
+def _today_utc() -> SimpleNamespace:
+    """Return the current UTC day in the formats used by activity payloads."""
 
-@pytest.mark.asyncio
-async def test_expired_days_sensor_returns_positive_days() -> None:
-    """Negative days are returned as positive remaining days."""
-    pet = {"petID": "1", "expired_days": -3}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock()
+    now = datetime.now(timezone.utc)
+    return SimpleNamespace(
+        dt=now, iso=now.strftime("%Y-%m-%d"), code=now.strftime("%Y%m%d")
+    )
+
+
+@pytest.mark.parametrize(
+    ("expired_days", "expected"),
+    [(0, LABEL_EXPIRED), (5, LABEL_EXPIRED), (-3, 3)],
+    ids=["zero_is_expired", "positive_is_expired", "negative_is_remaining"],
+)
+def test_expired_days_sensor_native_value(
+    hass_metric: SimpleNamespace, expired_days: int, expected: Any
+) -> None:
+    """Non-negative days report as expired, negative days as days remaining."""
+    pet = {"petID": "1", "expired_days": expired_days}
+    coordinator = _coordinator(data={"pets": [pet]})
     sensor = KippyExpiredDaysSensor(coordinator, pet)
-    hass = MagicMock()
-    hass.config.units.get_converted_unit.return_value = None
-    sensor.hass = hass
+    sensor.hass = hass_metric
 
-    assert sensor.native_value == 3
+    assert sensor.native_value == expected
 
 
-@pytest.mark.asyncio
-async def test_expired_days_sensor_uses_configured_unit() -> None:
+def test_expired_days_sensor_uses_configured_unit() -> None:
     """Expired days sensor converts to configured time unit."""
     pet = {"petID": "1", "expired_days": -2}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock()
+    coordinator = _coordinator(data={"pets": [pet]})
     sensor = KippyExpiredDaysSensor(coordinator, pet)
-    hass = MagicMock()
-    hass.config.units.get_converted_unit.return_value = UnitOfTime.HOURS
-    sensor.hass = hass
-    expected = DurationConverter.convert(2, UnitOfTime.DAYS, UnitOfTime.HOURS)
+    sensor.hass = _hass(duration_unit=UnitOfTime.HOURS)
     assert sensor.native_unit_of_measurement == UnitOfTime.HOURS
-    assert sensor.native_value == expected
+    assert sensor.native_value == _EXPIRED_2D_IN_HOURS
 
 
 def test_expired_days_sensor_invalid_unit_of_measurement() -> None:
     """Invalid expired day values result in no native unit."""
 
     pet = {"petID": "1", "expired_days": "n/a"}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock()
+    coordinator = _coordinator(data={"pets": [pet]})
     sensor = KippyExpiredDaysSensor(coordinator, pet)
 
     assert sensor.native_unit_of_measurement is None
 
 
-@pytest.mark.asyncio
-async def test_pet_type_sensor_maps_kind_to_type() -> None:
+@pytest.mark.parametrize(
+    ("kind", "expected"), PET_KIND_TO_TYPE.items(), ids=PET_KIND_TO_TYPE.values()
+)
+def test_pet_type_sensor_maps_kind_to_type(kind: str, expected: str) -> None:
     """Pet type sensor should map kind code to type label."""
-    pet = {"petID": "1", "petKind": "4"}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock()
+    pet = {"petID": "1", "petKind": kind}
+    coordinator = _coordinator(data={"pets": [pet]})
     sensor = KippyPetTypeSensor(coordinator, pet)
 
-    assert sensor.native_value == PET_KIND_TO_TYPE["4"]
+    assert sensor.native_value == expected
 
 
-@pytest.mark.asyncio
-async def test_operating_status_sensor_returns_string() -> None:
+@pytest.mark.parametrize(
+    "status",
+    [ENERGY_SAVING_LABEL, OPERATING_STATUS_STARTING_LIVE],
+    ids=["energy_saving", "starting_live"],
+)
+def test_operating_status_sensor_returns_string(status: str) -> None:
     """Operating status sensor should expose a human readable value."""
     pet = {"petID": "1"}
-    coordinator = MagicMock()
-    coordinator.data = {
-        "operating_status": OPERATING_STATUS_MAP[OPERATING_STATUS.ENERGY_SAVING]
-    }
-    coordinator.async_add_listener = MagicMock()
+    coordinator = _coordinator(data={"operating_status": status})
     sensor = KippyOperatingStatusSensor(coordinator, pet)
 
-    assert sensor.native_value == OPERATING_STATUS_MAP[OPERATING_STATUS.ENERGY_SAVING]
+    assert sensor.native_value == status
     assert sensor.device_info["name"] == "Kippy"
 
-    coordinator.data["operating_status"] = OPERATING_STATUS_STARTING_LIVE
-    assert sensor.native_value == OPERATING_STATUS_STARTING_LIVE
-
 
-@pytest.mark.asyncio
-async def test_home_distance_sensor_calculates_distance() -> None:
+def test_home_distance_sensor_calculates_distance(
+    hass_metric: SimpleNamespace,
+) -> None:
     """Home distance sensor should calculate distance in meters."""
-    hass = MagicMock()
-    hass.config.units.length_unit = UnitOfLength.KILOMETERS
-    hass.config.latitude = 0
-    hass.config.longitude = 0
-    coordinator = MagicMock()
-    coordinator.data = {"gps_latitude": 0, "gps_longitude": 1}
+    coordinator = _coordinator(data={"gps_latitude": 0, "gps_longitude": 1})
     sensor = KippyHomeDistanceSensor(coordinator, {"petID": "1"})
-    sensor.hass = hass
-    expected_m = location_distance(0, 0, 0, 1)
-    expected = DistanceConverter.convert(
-        expected_m, UnitOfLength.METERS, UnitOfLength.METERS
-    )
-    assert sensor.native_value == pytest.approx(expected)
+    sensor.hass = hass_metric
+    assert sensor.native_value == pytest.approx(_DIST_0_0_0_1_M)
     assert sensor.native_unit_of_measurement == UnitOfLength.METERS
 
 
-@pytest.mark.asyncio
-async def test_home_distance_sensor_uses_configured_unit() -> None:
+def test_home_distance_sensor_uses_configured_unit(
+    hass_imperial: SimpleNamespace,
+) -> None:
     """Distance sensor converts to configured length unit."""
-    hass = MagicMock()
-    hass.config.units.length_unit = UnitOfLength.MILES
-    hass.config.latitude = 0
-    hass.config.longitude = 0
-    coordinator = MagicMock()
-    coordinator.data = {"gps_latitude": 0, "gps_longitude": 1}
+    coordinator = _coordinator(data={"gps_latitude": 0, "gps_longitude": 1})
     sensor = KippyHomeDistanceSensor(coordinator, {"petID": "1"})
-    sensor.hass = hass
-    expected_m = location_distance(0, 0, 0, 1)
-    expected = DistanceConverter.convert(
-        expected_m, UnitOfLength.METERS, UnitOfLength.MILES
-    )
-    assert sensor.native_value == pytest.approx(expected)
+    sensor.hass = hass_imperial
+    assert sensor.native_value == pytest.approx(_DIST_0_0_0_1_MI)
     assert sensor.native_unit_of_measurement == UnitOfLength.MILES
 
 
-@pytest.mark.asyncio
-async def test_run_sensor_uses_configured_unit() -> None:
+def test_run_sensor_uses_configured_unit(today_utc: SimpleNamespace) -> None:
     """Run sensor converts minutes to configured time unit and suggests hours."""
-    hass = MagicMock()
-    hass.config.units.get_converted_unit.return_value = UnitOfTime.HOURS
-    coord = MagicMock()
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    coord.get_activities.return_value = [{"date": today, "run": 60}]
+    coord = _coordinator(activities=[{"date": today_utc.iso, "run": 60}])
     sensor = KippyRunSensor(coord, {"petID": 1})
-    sensor.hass = hass
-    expected = DurationConverter.convert(60, UnitOfTime.MINUTES, UnitOfTime.HOURS)
+    sensor.hass = _hass(duration_unit=UnitOfTime.HOURS)
     assert sensor.native_unit_of_measurement == UnitOfTime.HOURS
-    assert sensor.native_value == expected
+    assert sensor.native_value == _RUN_60M_IN_HOURS
     assert sensor.suggested_unit_of_measurement == UnitOfTime.HOURS
 
 
 def test_map_sensor_get_datetime_invalid() -> None:
     """Map-based sensors gracefully handle missing timestamps."""
 
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
-    coordinator.data = None
+    coordinator = _coordinator()
     sensor = KippyLastContactSensor(coordinator, {"petID": 1})
     assert sensor.native_value is None
 
@@ -199,18 +211,14 @@ def test_map_sensor_get_datetime_invalid() -> None:
     assert sensor.native_value is None
 
 
-def test_home_distance_sensor_handles_missing_coordinates(monkeypatch) -> None:
+def test_home_distance_sensor_handles_missing_coordinates(
+    monkeypatch, hass_metric: SimpleNamespace
+) -> None:
     """Distance sensor returns None for incomplete or invalid data."""
 
-    hass = MagicMock()
-    hass.config.units.length_unit = UnitOfLength.KILOMETERS
-    hass.config.latitude = 0
-    hass.config.longitude = 0
-
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
+    coordinator = _coordinator()
     sensor = KippyHomeDistanceSensor(coordinator, {"petID": 1})
-    sensor.hass = hass
+    sensor.hass = hass_metric
 
     coordinator.data = None
     assert sensor.native_value is None
@@ -218,34 +226,31 @@ def test_home_distance_sensor_handles_missing_coordinates(monkeypatch) -> None:
     coordinator.data = {"gps_latitude": None, "gps_longitude": 0}
     assert sensor.native_value is None
 
-    coordinator.data = {"gps_latitude": "a", "gps_longitude": "b"}
+    coordinator.data.update(gps_latitude="a", gps_longitude="b")
     assert sensor.native_value is None
 
     monkeypatch.setattr(
         "custom_components.kippy.sensor.location_distance", lambda *args, **kwargs: None
     )
-    coordinator.data = {"gps_latitude": 0, "gps_longitude": 0}
+    coordinator.data.update(gps_latitude=0, gps_longitude=0)
     assert sensor.native_value is None
 
 
 def test_activity_sensor_extra_state_none_without_data() -> None:
     """Activity sensor exposes no extra attributes until data is processed."""
 
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
-    coordinator.get_activities.return_value = []
+    coordinator = _coordinator(activities=[])
     sensor = KippyRunSensor(coordinator, {"petID": 1})
 
     assert sensor.extra_state_attributes is None
 
 
-def test_activity_sensor_returns_none_when_value_missing() -> None:
+def test_activity_sensor_returns_none_when_value_missing(
+    today_utc: SimpleNamespace,
+) -> None:
     """Missing values result in None native state."""
 
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    coordinator.get_activities.return_value = [{"date": today, "run": None}]
+    coordinator = _coordinator(activities=[{"date": today_utc.iso, "run": None}])
     sensor = KippyRunSensor(coordinator, {"petID": 1})
 
     assert sensor.native_value is None
@@ -254,8 +259,7 @@ def test_activity_sensor_returns_none_when_value_missing() -> None:
 def test_activity_sensor_grouped_activities_filters_nonmatching() -> None:
     """Grouped activities sum values for the current day only."""
 
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
+    coordinator = _coordinator()
     sensor = KippyRunSensor(coordinator, {"petID": 1})
     today = datetime(2024, 1, 2, tzinfo=timezone.utc)
     activities = [
@@ -281,31 +285,28 @@ def test_activity_sensor_grouped_activities_filters_nonmatching() -> None:
     assert date_str == "2024-01-02"
 
 
-def test_activity_sensor_grouped_activities_no_match_returns_none() -> None:
+def test_activity_sensor_grouped_activities_no_match_returns_none(
+    today_utc: SimpleNamespace,
+) -> None:
     """Grouped data without the metric returns no value."""
 
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
+    coordinator = _coordinator()
     sensor = KippyRunSensor(coordinator, {"petID": 1})
     activities = [{"activity": "walk", "data": []}]
 
-    total, date_str = sensor._value_from_grouped_activities(
-        activities, datetime.now(timezone.utc)
-    )
+    total, date_str = sensor._value_from_grouped_activities(activities, today_utc.dt)
     assert total is None and date_str is None
 
 
-def test_activity_sensor_daily_entries_nested_list() -> None:
+def test_activity_sensor_daily_entries_nested_list(today_utc: SimpleNamespace) -> None:
     """Daily entries handle nested activity lists and dictionaries."""
 
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
+    coordinator = _coordinator()
     sensor = KippyRunSensor(coordinator, {"petID": 1})
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     activities = [
         {"date": "1999-01-01", "run": 5},
         {
-            "date": today,
+            "date": today_utc.iso,
             "run": None,
             "activities": [
                 {"name": "run", "value": {"minutes": 7}},
@@ -313,240 +314,219 @@ def test_activity_sensor_daily_entries_nested_list() -> None:
         },
     ]
 
-    value, date_str = sensor._value_from_daily_entries(
-        activities, datetime.now(timezone.utc)
-    )
+    value, date_str = sensor._value_from_daily_entries(activities, today_utc.dt)
     assert value == 7
-    assert date_str == today
+    assert date_str == today_utc.iso
 
 
-def test_activity_sensor_daily_entries_no_match_returns_none() -> None:
+def test_activity_sensor_daily_entries_no_match_returns_none(
+    today_utc: SimpleNamespace,
+) -> None:
     """Daily entries return None when no data matches today."""
 
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
+    coordinator = _coordinator()
     sensor = KippyRunSensor(coordinator, {"petID": 1})
     activities = [{"date": "1999-01-01", "run": 5}]
-    value, date_str = sensor._value_from_daily_entries(
-        activities, datetime.now(timezone.utc)
-    )
+    value, date_str = sensor._value_from_daily_entries(activities, today_utc.dt)
     assert value is None and date_str is None
 
 
-def test_activity_sensor_extract_helpers() -> None:
-    """Helper methods extract dates and first-present values."""
-
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
-    sensor = KippyRunSensor(coordinator, {"petID": 1})
-
-    assert sensor._extract_date({"foo": "bar"}) is None
-    assert sensor._extract_first_present({"count": 3}, ("value", "count")) == 3
-
-
-def test_activity_sensor_activity_list_missing_metric_returns_none() -> None:
-    """Activity lists without the metric return None."""
-
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
-    sensor = KippyRunSensor(coordinator, {"petID": 1})
-    assert sensor._value_from_activity_list([{"name": "walk"}]) is None
-
-
-def test_activity_sensor_extract_first_present_returns_none() -> None:
-    """Missing keys result in None for first-present extraction."""
-
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
-    sensor = KippyRunSensor(coordinator, {"petID": 1})
-    assert sensor._extract_first_present({}, ("value", "count")) is None
-
-
-def test_activity_sensor_extract_numeric_invalid() -> None:
-    """Invalid numeric values are ignored."""
-
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
-    sensor = KippyRunSensor(coordinator, {"petID": 1})
-    data = {"value": "bad", "count": "also bad"}
-    assert sensor._extract_numeric_value(data, ("value", "count")) is None
-
-
-def test_activity_sensor_convert_invalid_value() -> None:
-    """Non-numeric activity values are ignored."""
+@pytest.fixture(name="run_sensor", scope="module")
+def _run_sensor() -> KippyRunSensor:
+    """Return a run sensor for exercising stateless helper methods."""
+
+    return KippyRunSensor(_coordinator(), {"petID": 1})
+
+
+@pytest.mark.parametrize(
+    ("method", "args", "expected"),
+    [
+        pytest.param("_extract_date", ({"foo": "bar"},), None, id="date_missing"),
+        pytest.param(
+            "_extract_first_present",
+            ({"count": 3}, ("value", "count")),
+            3,
+            id="first_present",
+        ),
+        pytest.param(
+            "_extract_first_present",
+            ({}, ("value", "count")),
+            None,
+            id="first_present_missing",
+        ),
+        pytest.param(
+            "_value_from_activity_list",
+            ([{"name": "walk"}],),
+            None,
+            id="activity_list_missing_metric",
+        ),
+        pytest.param(
+            "_extract_numeric_value",
+            ({"value": "bad", "count": "also bad"}, ("value", "count")),
+            None,
+            id="numeric_invalid",
+        ),
+        pytest.param(
+            "_convert_activity_value", ("invalid",), None, id="convert_invalid"
+        ),
+    ],
+)
+def test_activity_sensor_helpers(
+    run_sensor: KippyRunSensor, method: str, args: tuple[Any, ...], expected: Any
+) -> None:
+    """Activity helper methods extract values or ignore invalid payloads."""
 
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
-    sensor = KippyStepsSensor(coordinator, {"petID": 1})
-    assert sensor._convert_activity_value("invalid") is None
+    assert getattr(run_sensor, method)(*args) == expected
 
 
 def test_activity_sensor_native_value_grouped_missing_metric() -> None:
     """Grouped activity payloads without the metric return ``None``."""
 
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
-    coordinator.get_activities = MagicMock(
-        return_value=[{"activity": "walk", "data": []}]
-    )
+    coordinator = _coordinator(activities=[{"activity": "walk", "data": []}])
     sensor = KippyRunSensor(coordinator, {"petID": 1})
 
     assert sensor.native_value is None
 
 
-def test_activity_sensor_native_value_daily_missing_metric() -> None:
+def test_activity_sensor_native_value_daily_missing_metric(
+    today_utc: SimpleNamespace,
+) -> None:
     """Daily entries without metric data also return ``None``."""
 
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    coordinator.get_activities = MagicMock(
-        return_value=[{"date": today, "activities": [{"name": "walk"}]}]
+    coordinator = _coordinator(
+        activities=[{"date": today_utc.iso, "activities": [{"name": "walk"}]}]
     )
     sensor = KippyRunSensor(coordinator, {"petID": 1})
 
     assert sensor.native_value is None
 
 
-def test_activity_sensor_native_value_daily_missing_keys() -> None:
+def test_activity_sensor_native_value_daily_missing_keys(
+    today_utc: SimpleNamespace,
+) -> None:
     """Daily entries with empty dictionaries return ``None`` after extraction."""
 
-    coordinator = MagicMock()
-    coordinator.async_add_listener = MagicMock(return_value=lambda: None)
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    coordinator.get_activities = MagicMock(return_value=[{"date": today, "run": {}}])
+    coordinator = _coordinator(activities=[{"date": today_utc.iso, "run": {}}])
     sensor = KippyRunSensor(coordinator, {"petID": 1})
 
     assert sensor.native_value is None
 
 
-@pytest.mark.asyncio
-async def test_sensor_async_setup_entry_creates_entities() -> None:
-    """async_setup_entry adds sensors for each pet."""
-    hass = MagicMock()
-    entry = MagicMock()
-    entry.entry_id = "1"
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [{"petID": 1}]}
-    map_coordinator = MagicMock()
-    activity_coord = MagicMock()
-    hass.data = {
-        DOMAIN: {
-            entry.entry_id: {
-                "coordinator": coordinator,
-                "map_coordinators": {1: map_coordinator},
-                "activity_coordinator": activity_coord,
-            }
-        }
-    }
-    async_add_entities = MagicMock()
-    await async_setup_entry(hass, entry, async_add_entities)
-    async_add_entities.assert_called_once()
-    entities = async_add_entities.call_args[0][0]
-    assert any(isinstance(e, KippyExpiredDaysSensor) for e in entities)
-    assert any(isinstance(e, KippyNextContactSensor) for e in entities)
-    assert any(isinstance(e, KippyHomeDistanceSensor) for e in entities)
-    assert any(isinstance(e, KippyPlaySensor) for e in entities)
-
-
-@pytest.mark.asyncio
-async def test_sensor_async_setup_entry_expired_pet_only_basic_sensors() -> None:
-    """Expired pets only expose basic diagnostic sensors."""
-    hass = MagicMock()
-    entry = MagicMock()
-    entry.entry_id = "1"
-    coordinator = MagicMock()
-    coordinator.data = {
-        "pets": [
-            {"petID": 1, "kippyID": 1, "kippyIMEI": "a", "expired_days": -1},
-            {"petID": 2, "kippyID": 2, "kippyIMEI": "b", "expired_days": 0},
-        ]
-    }
-    map_coordinator = MagicMock()
-    activity_coord = MagicMock()
-    hass.data = {
+def _build_hass_data(
+    entry_id: str,
+    pets: list[dict[str, Any]],
+    map_coords: dict[int, Any] | None = None,
+    activity: Any = None,
+) -> dict[str, Any]:
+    """Return ``hass.data`` as ``async_setup_entry`` expects to find it."""
+
+    return {
         DOMAIN: {
-            entry.entry_id: {
-                "coordinator": coordinator,
-                "map_coordinators": {1: map_coordinator},
-                "activity_coordinator": activity_coord,
+            entry_id: {
+                "coordinator": _coordinator(data={"pets": pets}),
+                "map_coordinators": map_coords or {},
+                "activity_coordinator": activity or _coordinator(),
             }
         }
     }
-    async_add_entities = MagicMock()
-    await async_setup_entry(hass, entry, async_add_entities)
-    entities = async_add_entities.call_args[0][0]
-    expired_entities = [e for e in entities if getattr(e, "_pet_id", None) == 2]
-    assert len(expired_entities) == 3
-    assert {type(e) for e in expired_entities} == {
-        KippyExpiredDaysSensor,
-        KippyIDSensor,
-        KippyIMEISensor,
-    }
 
 
-@pytest.mark.asyncio
-async def test_sensor_async_setup_entry_no_pets() -> None:
-    """No sensors added when there are no pets."""
-    hass = MagicMock()
-    entry = MagicMock()
-    entry.entry_id = "1"
-    coordinator = MagicMock()
-    coordinator.data = {"pets": []}
-    hass.data = {
-        DOMAIN: {
-            entry.entry_id: {
-                "coordinator": coordinator,
-                "map_coordinators": {},
-                "activity_coordinator": MagicMock(),
-            }
-        }
-    }
-    async_add_entities = MagicMock()
-    await async_setup_entry(hass, entry, async_add_entities)
-    async_add_entities.assert_called_once_with([])
+@pytest.fixture(name="setup_entry_ctx")
+def _setup_entry_ctx() -> SimpleNamespace:
+    """Return shared entry scaffolding for ``async_setup_entry``."""
+
+    return SimpleNamespace(
+        entry=SimpleNamespace(entry_id="1"), async_add_entities=MagicMock()
+    )
+
+
+@SESSION_LOOP
+@pytest.mark.parametrize(
+    ("pets", "pet_id", "expected_types", "expected_count"),
+    [
+        pytest.param(
+            [{"petID": 1}],
+            1,
+            {
+                KippyExpiredDaysSensor,
+                KippyNextContactSensor,
+                KippyHomeDistanceSensor,
+                KippyPlaySensor,
+            },
+            27,
+            id="creates_entities",
+        ),
+        pytest.param(
+            [
+                {"petID": 1, "kippyID": 1, "kippyIMEI": "a", "expired_days": -1},
+                {"petID": 2, "kippyID": 2, "kippyIMEI": "b", "expired_days": 0},
+            ],
+            2,
+            {KippyExpiredDaysSensor, KippyIDSensor, KippyIMEISensor},
+            3,
+            id="expired_pet_only_basic_sensors",
+        ),
+        pytest.param([], None, set(), 0, id="no_pets"),
+    ],
+)
+async def test_sensor_async_setup_entry(
+    setup_entry_ctx: SimpleNamespace,
+    pets: list[dict[str, Any]],
+    pet_id: int | None,
+    expected_types: set[type],
+    expected_count: int,
+) -> None:
+    """async_setup_entry adds the expected sensors for each pet.
+
+    ``pet_id`` selects the pet whose entities are checked; ``None`` checks all.
+    """
+    entry = setup_entry_ctx.entry
+    hass = SimpleNamespace(
+        data=_build_hass_data(entry.entry_id, pets, {1: _coordinator()})
+    )
+    await async_setup_entry(hass, entry, setup_entry_ctx.async_add_entities)
+    setup_entry_ctx.async_add_entities.assert_called_once()
+    entities = setup_entry_ctx.async_add_entities.call_args[0][0]
+    type_counts = Counter(
+        type(e) for e in entities if pet_id is None or e._pet_id == pet_id
+    )
+    assert type_counts.total() == expected_count
+    assert expected_types <= type_counts.keys()
 
 
 def test_base_entity_updates_and_device_info() -> None:
     """_handle_coordinator_update refreshes pet data and device info."""
     pet1 = {"petID": 1, "petName": "Rex", "kippyID": 2}
-    coord = MagicMock()
-    coord.data = {"pets": [pet1]}
-    coord.async_add_listener = MagicMock()
+    coord = _coordinator(data={"pets": [pet1]})
     sensor = KippyIDSensor(coord, pet1)
-    sensor.hass = MagicMock()
+    sensor.hass = Mock(spec=HomeAssistant)
     sensor.entity_id = "sensor.test"
     coord.data = {"pets": [{"petID": 1, "petName": "Max", "kippyID": 3}]}
-    sensor.async_write_ha_state = MagicMock()
+    sensor.async_write_ha_state = Mock()
     sensor._handle_coordinator_update()
     sensor.async_write_ha_state.assert_called_once()
     assert sensor.device_info["name"] == "Kippy Max"
     assert sensor.native_value == 3
 
 
-def test_expired_days_invalid_and_none() -> None:
+def test_expired_days_invalid_and_none(hass_metric: SimpleNamespace) -> None:
     """Expired days sensor handles invalid values."""
-    pet = {"petID": 1, "expired_days": "bad"}
-    coord = MagicMock()
-    coord.data = {"pets": [pet]}
-    coord.async_add_listener = MagicMock()
+    pet = {"petID": 1}
+    coord = _coordinator(data={"pets": [pet]})
     sensor = KippyExpiredDaysSensor(coord, pet)
-    hass = MagicMock()
-    hass.config.units.get_converted_unit.return_value = None
-    sensor.hass = hass
-    assert sensor.native_value is None
-    pet["expired_days"] = None
-    assert sensor.native_value is None
+    sensor.hass = hass_metric
+    for value in ("bad", None, "", []):
+        pet["expired_days"] = value
+        assert sensor.native_value is None, value
 
 
 def test_imei_sensor_and_battery_sensor() -> None:
     """IMEI and battery sensors expose data."""
     pet = {"petID": 1, "kippyIMEI": "abc", "battery": "50"}
-    coord = MagicMock()
-    coord.data = {"gps_time": 1, "battery": 60}
+    coord = _coordinator(data={"gps_time": 1, "battery": 60})
     sensor_batt = KippyBatterySensor(coord, pet)
     assert sensor_batt.native_value == 60
-    coord.data = {}
+    coord.data.clear()
     assert sensor_batt.native_value == 50
     pet_bad = {"petID": 2, "battery": "bad"}
     sensor_batt2 = KippyBatterySensor(coord, pet_bad)
@@ -557,49 +537,45 @@ def test_imei_sensor_and_battery_sensor() -> None:
 
 def test_localization_and_time_sensors() -> None:
     """Map-based sensors convert timestamps."""
-    coord = MagicMock()
-    coord.data = {
-        "localization_technology": "GPS",
-        "contact_time": 1,
-        "fix_time": "bad",
-        "gps_time": 2,
-        "lbs_time": 3,
-    }
+    coord = _coordinator(
+        data={
+            "localization_technology": "GPS",
+            "contact_time": 1,
+            "fix_time": "bad",
+            "gps_time": 2,
+            "lbs_time": 3,
+        }
+    )
     pet = {"petID": 1, "petName": "Rex"}
-    loc = KippyLocalizationTechnologySensor(coord, pet)
-    assert loc.native_value == "GPS"
-    assert loc.device_info["name"] == "Kippy Rex"
-    contact = KippyLastContactSensor(coord, pet)
-    assert contact.native_value == datetime.fromtimestamp(1, timezone.utc)
-    assert contact.device_info["name"] == "Kippy Rex"
-    fix = KippyLastFixSensor(coord, pet)
-    assert fix.native_value is None
-    gps = KippyLastGpsFixSensor(coord, pet)
-    assert gps.native_value == datetime.fromtimestamp(2, timezone.utc)
-    lbs = KippyLastLbsFixSensor(coord, pet)
-    assert lbs.native_value == datetime.fromtimestamp(3, timezone.utc)
-
-
-def test_next_contact_sensor_native_value() -> None:
+    cases = [
+        (KippyLocalizationTechnologySensor, "GPS"),
+        (KippyLastContactSensor, _DT_1),
+        (KippyLastFixSensor, None),
+        (KippyLastGpsFixSensor, _DT_2),
+        (KippyLastLbsFixSensor, _DT_3),
+    ]
+    for cls, expected in cases:
+        sensor = cls(coord, pet)
+        assert sensor.native_value == expected, cls.__name__
+        assert sensor.device_info["name"] == "Kippy Rex"
+
+
+def test_next_contact_sensor_native_value(
+    capture_listener: Callable[[Any], Callable[..., Any]],
+) -> None:
     """Next contact uses contact time and update frequency."""
-    coord = MagicMock()
-    coord.data = {"contact_time": 10}
-    base_coord = MagicMock()
+    coord = _coordinator(data={"contact_time": 10})
+    base_coord = Mock(spec=KippyDataUpdateCoordinator)
     pet = {"petID": 1, "petName": "Rex", "updateFrequency": 5}
     base_coord.data = {"pets": [pet]}
-
-    def add_listener(cb):
-        base_coord.listener = cb
-        return MagicMock()
-
-    base_coord.async_add_listener.side_effect = add_listener
+    base_coord.async_add_listener.side_effect = capture_listener(base_coord)
     sensor = KippyNextContactSensor(coord, base_coord, pet)
-    assert sensor.native_value == datetime.fromtimestamp(10 + 5 * 3600, timezone.utc)
+    assert sensor.native_value == _NEXT_CONTACT_5H
 
-    coord.data = {"contact_time": None}
+    coord.data["contact_time"] = None
     assert sensor.native_value is None
 
-    coord.data = {"contact_time": 10}
+    coord.data["contact_time"] = 10
     pet["updateFrequency"] = None
     assert sensor.native_value is None
 
@@ -607,121 +583,121 @@ def test_next_contact_sensor_native_value() -> None:
     assert sensor.native_value is None
 
 
-def test_next_contact_sensor_updates_on_frequency_change() -> None:
+def test_next_contact_sensor_updates_on_frequency_change(
+    capture_listener: Callable[[Any], Callable[..., Any]],
+) -> None:
     """Sensor updates when the GPS update frequency changes."""
-    coord = MagicMock()
-    coord.data = {"contact_time": 10}
-    base_coord = MagicMock()
+    coord = _coordinator(data={"contact_time": 10})
+    base_coord = Mock(spec=KippyDataUpdateCoordinator)
     pet = {"petID": 1, "petName": "Rex", "updateFrequency": 5}
     base_coord.data = {"pets": [pet]}
-
-    def add_listener(cb):
-        base_coord.listener = cb
-        return MagicMock()
-
-    base_coord.async_add_listener.side_effect = add_listener
+    base_coord.async_add_listener.side_effect = capture_listener(base_coord)
     sensor = KippyNextContactSensor(coord, base_coord, pet)
-    sensor.hass = MagicMock()
-    sensor.async_write_ha_state = MagicMock()
-    assert sensor.native_value == datetime.fromtimestamp(10 + 5 * 3600, timezone.utc)
+    sensor.hass = Mock(spec=HomeAssistant)
+    sensor.async_write_ha_state = Mock()
+    assert sensor.native_value == _NEXT_CONTACT_5H
 
     pet["updateFrequency"] = 6
     base_coord.data = {"pets": [pet]}
     base_coord.listener()
-    assert sensor.native_value == datetime.fromtimestamp(10 + 6 * 3600, timezone.utc)
+    assert sensor.native_value == _NEXT_CONTACT_6H
 
 
-def test_activity_sensor_handles_cat_and_dog_data() -> None:
+def test_activity_sensor_handles_cat_and_dog_data(today_utc: SimpleNamespace) -> None:
     """Activity sensor parses both cat-style and dog-style payloads."""
-    api_coord = MagicMock()
-    api_coord.get_activities = MagicMock()
-    coord = MagicMock()
-    today = datetime.now(timezone.utc)
-    today_code = today.strftime("%Y%m%d")
-    coord.get_activities = MagicMock(
-        return_value=[
+    coord = _coordinator(
+        activities=[
             {"activity": "other", "data": []},
-            {"activity": "steps", "data": [{"timeCaption": today_code, "value": "5"}]},
+            {
+                "activity": "steps",
+                "data": [{"timeCaption": today_utc.code, "value": "5"}],
+            },
         ]
     )
     sensor = KippyStepsSensor(coord, {"petID": 1, "petName": "Rex"})
     assert sensor.native_value == 5
     assert sensor.device_info["name"] == "Kippy Rex"
-    assert sensor.extra_state_attributes == {"date": today.strftime("%Y-%m-%d")}
+    assert sensor.extra_state_attributes == {"date": today_utc.iso}
 
-    coord.get_activities.return_value = [
-        {"date": today.strftime("%Y-%m-%d"), "steps": "7"}
-    ]
+    coord.activities = [{"date": today_utc.iso, "steps": "7"}]
     sensor._date = None
     assert sensor.native_value == 7
 
-    coord.get_activities.return_value = None
+    coord.activities = None
     assert sensor.native_value is None
 
 
-@pytest.mark.asyncio
-async def test_energy_saving_status_sensor_pending_and_updates() -> None:
-    """Energy saving status sensor reflects pending and confirmed states."""
+async def _noop(*_args: Any, **_kwargs: Any) -> None:
+    """Stand in for API coroutines whose calls are never inspected."""
+
+
+@pytest.fixture(name="energy_saving_ctx")
+def _energy_saving_ctx(make_coordinator: Callable[..., Mock]) -> SimpleNamespace:
+    """Return an energy saving switch and status sensor sharing one pet."""
+
     pet = {"petID": "1", "energySavingMode": 0, "kippyID": 1}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock()
-    coordinator.api.modify_kippy_settings = AsyncMock()
-    coordinator.async_set_updated_data = MagicMock()
-    map_coordinator = MagicMock()
-    map_coordinator.data = {}
-    map_coordinator.async_add_listener = MagicMock(return_value=MagicMock())
+    coordinator = make_coordinator({"pets": [pet]})
+    coordinator.api.modify_kippy_settings = _noop
+    map_coordinator = _coordinator(data={})
     switch = KippyEnergySavingSwitch(coordinator, pet, map_coordinator)
-    switch.async_write_ha_state = MagicMock()
+    switch.async_write_ha_state = Mock()
     sensor = KippyEnergySavingStatusSensor(coordinator, pet)
+    return SimpleNamespace(
+        switch=switch, sensor=sensor, pet=pet, map_coordinator=map_coordinator
+    )
 
-    assert sensor.native_value == "off"
 
-    await switch.async_turn_on()
-    assert sensor.native_value == "on_pending"
+async def _turn_on(ctx: SimpleNamespace) -> None:
+    await ctx.switch.async_turn_on()
 
-    map_coordinator.data["operating_status"] = OPERATING_STATUS_MAP[
-        OPERATING_STATUS.ENERGY_SAVING
-    ]
-    switch._handle_map_update()
-    assert sensor.native_value == "on"
 
-    await switch.async_turn_off()
-    assert sensor.native_value == "off_pending"
+async def _turn_off(ctx: SimpleNamespace) -> None:
+    await ctx.switch.async_turn_off()
 
-    switch._handle_map_update()
-    assert sensor.native_value == "off_pending"
 
-    map_coordinator.data["operating_status"] = OPERATING_STATUS_MAP[
-        OPERATING_STATUS.IDLE
-    ]
-    switch._handle_map_update()
-    assert sensor.native_value == "off"
+def _map_status(status: str) -> Callable[[SimpleNamespace], Awaitable[None]]:
+    """Return an action reporting ``status`` through the map coordinator."""
 
+    async def _apply(ctx: SimpleNamespace) -> None:
+        ctx.map_coordinator.data["operating_status"] = status
+        ctx.switch._handle_map_update()
 
-@pytest.mark.asyncio
-async def test_energy_saving_status_sensor_cancel_pending() -> None:
-    """Toggling again cancels pending state for energy saving status sensor."""
-    pet = {"petID": "1", "energySavingMode": 0, "kippyID": 1}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock()
-    coordinator.api.modify_kippy_settings = AsyncMock()
-    coordinator.async_set_updated_data = MagicMock()
-    map_coordinator = MagicMock()
-    map_coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    switch = KippyEnergySavingSwitch(coordinator, pet, map_coordinator)
-    switch.async_write_ha_state = MagicMock()
-    sensor = KippyEnergySavingStatusSensor(coordinator, pet)
+    return _apply
 
-    await switch.async_turn_on()
-    assert sensor.native_value == "on_pending"
 
-    await switch.async_turn_off()
+@SESSION_LOOP
+@pytest.mark.parametrize(
+    "steps",
+    [
+        pytest.param(
+            [
+                (_turn_on, "on_pending"),
+                (_map_status(ENERGY_SAVING_LABEL), "on"),
+                (_turn_off, "off_pending"),
+                (_map_status(ENERGY_SAVING_LABEL), "off_pending"),
+                (_map_status(IDLE_LABEL), "off"),
+            ],
+            id="pending_and_updates",
+        ),
+        pytest.param(
+            [
+                (_turn_on, "on_pending"),
+                (_turn_off, "off"),
+                (_turn_off, "off_pending"),
+                (_turn_on, "on"),
+            ],
+            id="cancel_pending",
+        ),
+    ],
+)
+async def test_energy_saving_status_sensor_flow(
+    energy_saving_ctx: SimpleNamespace,
+    steps: list[tuple[Callable[[SimpleNamespace], Awaitable[None]], str]],
+) -> None:
+    """Energy saving status sensor tracks pending, confirmed and cancelled states."""
+    sensor = energy_saving_ctx.sensor
     assert sensor.native_value == "off"
 
-    await switch.async_turn_off()
-    assert sensor.native_value == "off_pending"
-
-    await switch.async_turn_on()
-    assert sensor.native_value == "on"
+    for action, expected in steps:
+        await action(energy_saving_ctx)
+        assert sensor.native_value == expected, action.__name__
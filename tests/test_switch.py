@@ -1,20 +1,24 @@
 # pylint: disable=missing-function-docstring,protected-access,duplicate-code
+# pylint: disable=too-many-arguments,too-many-positional-arguments
 
 """Tests for Kippy switch entities."""
 
-import asyncio
-from unittest.mock import AsyncMock, MagicMock, call
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Callable
+from unittest.mock import Mock, call
 
 import pytest
+from homeassistant.components.switch import SwitchEntity
+from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
 
 from custom_components.kippy.const import (
     APP_ACTION,
     DOMAIN,
-    OPERATING_STATUS,
-    OPERATING_STATUS_MAP,
     OPERATING_STATUS_STARTING_LIVE,
 )
+from custom_components.kippy.coordinator import KippyMapDataUpdateCoordinator
 from custom_components.kippy.switch import (
     KippyEnergySavingSwitch,
     KippyGpsDefaultSwitch,
@@ -22,52 +26,101 @@ from custom_components.kippy.switch import (
     KippyLiveTrackingSwitch,
     async_setup_entry,
 )
+from tests.common import ENERGY_SAVING_LABEL, IDLE_LABEL, LIVE_LABEL, SESSION_LOOP
+
+# Copy or unpack before use; the switches mutate the pet dicts they are given.
+_BASE_PET = {"petID": 1}
+_NAMED_PET = {**_BASE_PET, "petName": "Rex"}
+_ENERGY_SAVING_PET = {"petID": "1", "energySavingMode": 0}
+
+
+def _silence_write(switch: SwitchEntity) -> Mock:
+    """Replace the entity's state writer with a Mock and return it."""
+    write = Mock()
+    switch.async_write_ha_state = write
+    return write
+
+
+async def _raise_runtime(*_args: Any, **_kwargs: Any) -> None:
+    raise RuntimeError
+
+
+@pytest.fixture(name="energy_switch")
+def _energy_switch(
+    make_coordinator: Callable[..., Mock],
+) -> Callable[..., tuple[KippyEnergySavingSwitch, Mock]]:
+    """Return a factory for an energy saving switch and its base coordinator."""
+
+    def _make(
+        pet: dict[str, Any], map_data: dict[str, Any] | None = None
+    ) -> tuple[KippyEnergySavingSwitch, Mock]:
+        coordinator = make_coordinator({"pets": [pet]})
+        map_coordinator = make_coordinator(map_data, spec=KippyMapDataUpdateCoordinator)
+        switch = KippyEnergySavingSwitch(coordinator, pet, map_coordinator)
+        _silence_write(switch)
+        return switch, coordinator
+
+    return _make
+
+
+@pytest.fixture(name="live_switch")
+def _live_switch(
+    make_coordinator: Callable[..., Mock],
+) -> Callable[..., tuple[KippyLiveTrackingSwitch, Mock]]:
+    """Return a factory for a live tracking switch and its map coordinator."""
+
+    def _make(
+        operating_status: str = LIVE_LABEL, pet: dict[str, Any] | None = None
+    ) -> tuple[KippyLiveTrackingSwitch, Mock]:
+        coordinator = make_coordinator(
+            {"operating_status": operating_status},
+            spec=KippyMapDataUpdateCoordinator,
+            kippy_id=1,
+        )
+        switch = KippyLiveTrackingSwitch(coordinator, pet or _BASE_PET.copy())
+        switch.hass = Mock(spec=HomeAssistant)
+        switch.entity_id = "switch.live"
+        _silence_write(switch)
+        return switch, coordinator
+
+    return _make
+
+
+@pytest.mark.parametrize(
+    ("operating_status", "expected_on"),
+    [
+        pytest.param(ENERGY_SAVING_LABEL, True, id="energy_saving"),
+        pytest.param(IDLE_LABEL, False, id="idle"),
+        pytest.param(LIVE_LABEL, False, id="live"),
+    ],
+)
+def test_energy_saving_switch_updates_from_operating_status(
+    energy_switch: Callable[..., tuple[KippyEnergySavingSwitch, Mock]],
+    operating_status: str,
+    expected_on: bool,
+) -> None:
+    """Energy saving switch turns on only when the map reports energy saving."""
+    pet = _ENERGY_SAVING_PET.copy()
 
-
-@pytest.mark.asyncio
-async def test_energy_saving_switch_updates_from_operating_status() -> None:
-    """Energy saving switch turns on when operating status is energy saving."""
-    pet = {"petID": "1", "energySavingMode": 0}
-
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-
-    map_coordinator = MagicMock()
-    map_coordinator.data = {
-        "operating_status": OPERATING_STATUS_MAP[OPERATING_STATUS.ENERGY_SAVING]
-    }
-    map_coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-
-    switch = KippyEnergySavingSwitch(coordinator, pet, map_coordinator)
-    switch.async_write_ha_state = MagicMock()
+    switch, _ = energy_switch(pet, {"operating_status": operating_status})
 
     assert not switch.is_on
 
     switch._handle_map_update()
 
-    assert switch.is_on
-    assert pet["energySavingMode"] == 1
+    assert switch.is_on is expected_on
+    assert pet["energySavingMode"] == int(expected_on)
+    switch.async_write_ha_state.assert_called_once()
 
 
-@pytest.mark.asyncio
-async def test_energy_saving_switch_preserves_pending_off() -> None:
+@SESSION_LOOP
+async def test_energy_saving_switch_preserves_pending_off(
+    energy_switch: Callable[..., tuple[KippyEnergySavingSwitch, Mock]],
+) -> None:
     """Energy saving switch keeps pending off when still energy saving."""
-    pet = {"petID": "1", "energySavingMode": 1}
+    pet = {**_ENERGY_SAVING_PET, "energySavingMode": 1}
 
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    coordinator.async_set_updated_data = MagicMock()
-
-    map_coordinator = MagicMock()
-    map_coordinator.data = {
-        "operating_status": OPERATING_STATUS_MAP[OPERATING_STATUS.ENERGY_SAVING]
-    }
-    map_coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-
-    switch = KippyEnergySavingSwitch(coordinator, pet, map_coordinator)
-    switch.async_write_ha_state = MagicMock()
+    switch, coordinator = energy_switch(pet, {"operating_status": ENERGY_SAVING_LABEL})
 
     await switch.async_turn_off()
     assert pet["energySavingMode"] == 0
@@ -80,84 +133,49 @@ async def test_energy_saving_switch_preserves_pending_off() -> None:
     coordinator.async_set_updated_data.assert_not_called()
 
 
-def test_live_tracking_switch_operating_status() -> None:
-    """Live tracking switch follows operating status and availability."""
-    pet = {"petID": 1}
-    coordinator = MagicMock()
-    coordinator.data = {"operating_status": OPERATING_STATUS_MAP[OPERATING_STATUS.LIVE]}
-    coordinator.async_add_listener = MagicMock()
-    coordinator.last_update_success = True
-    switch = KippyLiveTrackingSwitch(coordinator, pet)
-    switch.hass = MagicMock()
-    switch.entity_id = "switch.live"
-    switch.async_write_ha_state = MagicMock()
-
-    assert switch.is_on
-    assert switch.available
-
-    coordinator.data["operating_status"] = OPERATING_STATUS_MAP[OPERATING_STATUS.IDLE]
-    switch._handle_coordinator_update()
-    assert not switch.is_on
-    assert switch.available
-
-    coordinator.data["operating_status"] = OPERATING_STATUS_STARTING_LIVE
-    switch._handle_coordinator_update()
-    assert switch.is_on
-    assert switch.available
-
-    coordinator.data["operating_status"] = OPERATING_STATUS_MAP[
-        OPERATING_STATUS.ENERGY_SAVING
-    ]
+@pytest.mark.parametrize(
+    ("operating_status", "expected_on", "expected_available"),
+    [
+        pytest.param(LIVE_LABEL, True, True, id="live"),
+        pytest.param(OPERATING_STATUS_STARTING_LIVE, True, True, id="starting_live"),
+        pytest.param(IDLE_LABEL, False, True, id="idle"),
+        pytest.param(ENERGY_SAVING_LABEL, False, False, id="energy_saving"),
+    ],
+)
+@SESSION_LOOP
+async def test_live_tracking_switch_operating_status(
+    live_switch: Callable[..., tuple[KippyLiveTrackingSwitch, Mock]],
+    operating_status: str,
+    expected_on: bool,
+    expected_available: bool,
+) -> None:
+    """Live tracking switch follows operating status and blocks energy saving."""
+    switch, coordinator = live_switch(IDLE_LABEL)
+
+    coordinator.data["operating_status"] = operating_status
     switch._handle_coordinator_update()
-    assert not switch.is_on
-    assert not switch.available
-
 
-@pytest.mark.asyncio
-async def test_live_tracking_switch_unavailable_energy_saving() -> None:
-    """Live tracking switch is unavailable and blocks toggling in energy saving mode."""
-    pet = {"petID": 1}
-    coordinator = MagicMock()
-    coordinator.data = {
-        "operating_status": OPERATING_STATUS_MAP[OPERATING_STATUS.ENERGY_SAVING]
-    }
-    coordinator.async_add_listener = MagicMock()
-    coordinator.api.kippymap_action = AsyncMock()
-    coordinator.kippy_id = 1
-    switch = KippyLiveTrackingSwitch(coordinator, pet)
-    switch.hass = MagicMock()
-    switch.entity_id = "switch.live"
-    switch.async_write_ha_state = MagicMock()
-
-    assert not switch.is_on
-    assert not switch.available
-
-    with pytest.raises(HomeAssistantError):
-        await switch.async_turn_on()
-    assert switch.async_write_ha_state.called
-    assert not switch.is_on
-
-    switch.async_write_ha_state.reset_mock()
-
-    with pytest.raises(HomeAssistantError):
-        await switch.async_turn_off()
-    assert switch.async_write_ha_state.called
-    assert not switch.is_on
+    assert switch.is_on is expected_on
+    assert switch.available is expected_available
+    if expected_available:
+        return
+
+    for action in (switch.async_turn_on, switch.async_turn_off):
+        switch.async_write_ha_state.reset_mock()
+        with pytest.raises(HomeAssistantError):
+            await action()
+        switch.async_write_ha_state.assert_called_once()
+        assert not switch.is_on
     coordinator.api.kippymap_action.assert_not_called()
 
 
-@pytest.mark.asyncio
-async def test_energy_saving_switch_calls_api() -> None:
+@SESSION_LOOP
+async def test_energy_saving_switch_calls_api(
+    energy_switch: Callable[..., tuple[KippyEnergySavingSwitch, Mock]],
+) -> None:
     """Energy saving switch sends API requests when toggled."""
-    pet = {"petID": "1", "energySavingMode": 0, "kippyID": 1}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    coordinator.api.modify_kippy_settings = AsyncMock()
-    map_coordinator = MagicMock()
-    map_coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    switch = KippyEnergySavingSwitch(coordinator, pet, map_coordinator)
-    switch.async_write_ha_state = MagicMock()
+    pet = {**_ENERGY_SAVING_PET, "kippyID": 1}
+    switch, coordinator = energy_switch(pet)
     await switch.async_turn_on()
     await switch.async_turn_off()
     coordinator.api.modify_kippy_settings.assert_has_awaits(
@@ -168,76 +186,85 @@ async def test_energy_saving_switch_calls_api() -> None:
     )
 
 
-@pytest.mark.asyncio
-async def test_live_tracking_switch_turns_on_off() -> None:
-    """Live tracking switch calls API and processes data."""
-    pet = {"petID": 1, "petName": "Rex"}
-    coordinator = MagicMock()
-    coordinator.data = {"operating_status": OPERATING_STATUS_MAP[OPERATING_STATUS.IDLE]}
-    coordinator.kippy_id = 1
-    coordinator.api.kippymap_action = AsyncMock(
-        return_value={"operating_status": OPERATING_STATUS_MAP[OPERATING_STATUS.LIVE]}
-    )
-    coordinator.process_new_data = MagicMock()
-    coordinator.async_add_listener = MagicMock()
-    switch = KippyLiveTrackingSwitch(coordinator, pet)
-    switch.hass = MagicMock()
-    switch.entity_id = "switch.live"
-    switch.async_write_ha_state = MagicMock()
-    await switch.async_turn_on()
-    coordinator.api.kippymap_action.assert_called_once_with(
-        1, app_action=APP_ACTION.TURN_LIVE_TRACKING_ON
-    )
-    coordinator.process_new_data.assert_called_once()
-    assert (
-        coordinator.data.get("operating_status")
-        == OPERATING_STATUS_MAP[OPERATING_STATUS.LIVE]
-    )
-    coordinator.api.kippymap_action.reset_mock()
-    coordinator.process_new_data.reset_mock()
-    coordinator.api.kippymap_action.return_value = {
-        "operating_status": OPERATING_STATUS_MAP[OPERATING_STATUS.LIVE]
-    }
-    coordinator.data["operating_status"] = OPERATING_STATUS_MAP[OPERATING_STATUS.LIVE]
-    await switch.async_turn_off()
-    coordinator.api.kippymap_action.assert_called_once_with(
-        1, app_action=APP_ACTION.TURN_LIVE_TRACKING_OFF
-    )
-    coordinator.process_new_data.assert_called_once()
-    assert (
-        coordinator.data.get("operating_status")
-        == OPERATING_STATUS_MAP[OPERATING_STATUS.IDLE]
-    )
-
-
-@pytest.mark.asyncio
-async def test_live_tracking_switch_propagates_error() -> None:
+@pytest.mark.parametrize(
+    ("initial", "action", "app_action", "expected_status", "expected_on"),
+    [
+        pytest.param(
+            IDLE_LABEL,
+            "async_turn_on",
+            APP_ACTION.TURN_LIVE_TRACKING_ON,
+            LIVE_LABEL,
+            True,
+            id="idle_turn_on",
+        ),
+        pytest.param(
+            OPERATING_STATUS_STARTING_LIVE,
+            "async_turn_on",
+            APP_ACTION.TURN_LIVE_TRACKING_ON,
+            OPERATING_STATUS_STARTING_LIVE,
+            True,
+            id="starting_live_turn_on",
+        ),
+        pytest.param(
+            LIVE_LABEL,
+            "async_turn_off",
+            APP_ACTION.TURN_LIVE_TRACKING_OFF,
+            IDLE_LABEL,
+            False,
+            id="live_turn_off",
+        ),
+        pytest.param(
+            IDLE_LABEL,
+            "async_turn_off",
+            APP_ACTION.TURN_LIVE_TRACKING_OFF,
+            IDLE_LABEL,
+            False,
+            id="idle_turn_off",
+        ),
+    ],
+)
+@SESSION_LOOP
+async def test_live_tracking_switch_transitions(
+    live_switch: Callable[..., tuple[KippyLiveTrackingSwitch, Mock]],
+    initial: str,
+    action: str,
+    app_action: APP_ACTION,
+    expected_status: str,
+    expected_on: bool,
+) -> None:
+    """Live tracking switch calls the API, processes data and settles status."""
+    switch, coordinator = live_switch(initial, _NAMED_PET.copy())
+    api_data = {"operating_status": initial}
+    coordinator.api.kippymap_action.return_value = api_data
+
+    await getattr(switch, action)()
+
+    coordinator.api.kippymap_action.assert_called_once_with(1, app_action=app_action)
+    coordinator.process_new_data.assert_called_once_with(api_data)
+    assert coordinator.data["operating_status"] == expected_status
+    assert switch.is_on is expected_on
+
+
+@SESSION_LOOP
+async def test_live_tracking_switch_propagates_error(
+    live_switch: Callable[..., tuple[KippyLiveTrackingSwitch, Mock]],
+) -> None:
     """Errors from API propagate out of the switch."""
-    pet = {"petID": 1}
-    coordinator = MagicMock()
-    coordinator.data = {}
-    coordinator.kippy_id = 1
-    coordinator.api.kippymap_action = AsyncMock(side_effect=RuntimeError)
-    coordinator.async_add_listener = MagicMock()
-    switch = KippyLiveTrackingSwitch(coordinator, pet)
-    switch.hass = MagicMock()
-    switch.entity_id = "switch.live"
-    switch.async_write_ha_state = MagicMock()
+    switch, coordinator = live_switch(IDLE_LABEL)
+    coordinator.api.kippymap_action = _raise_runtime
     with pytest.raises(RuntimeError):
         await switch.async_turn_on()
 
 
-@pytest.mark.asyncio
+@SESSION_LOOP
 async def test_ignore_lbs_switch_toggles_coordinator() -> None:
     """Ignore LBS switch mirrors coordinator flag."""
-    pet = {"petID": 1, "petName": "Rex"}
-    map_coord = MagicMock()
-    map_coord.ignore_lbs = False
-    map_coord.async_add_listener = MagicMock()
+    pet = _NAMED_PET.copy()
+    map_coord = SimpleNamespace(ignore_lbs=False)
     switch = KippyIgnoreLBSSwitch(map_coord, pet)
-    switch.hass = MagicMock()
+    switch.hass = Mock(spec=HomeAssistant)
     switch.entity_id = "switch.lbs"
-    switch.async_write_ha_state = MagicMock()
+    _silence_write(switch)
     assert not switch.is_on
     await switch.async_turn_on()
     assert map_coord.ignore_lbs is True
@@ -245,16 +272,13 @@ async def test_ignore_lbs_switch_toggles_coordinator() -> None:
     assert map_coord.ignore_lbs is False
 
 
-@pytest.mark.asyncio
-async def test_gps_switch_calls_api() -> None:
+@SESSION_LOOP
+async def test_gps_switch_calls_api(make_coordinator: Callable[..., Mock]) -> None:
     """GPS activation switch toggles via API."""
-    pet = {"petID": 1, "petName": "Rex", "gpsOnDefault": 1, "kippyID": 1}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    coordinator.api.modify_kippy_settings = AsyncMock()
+    pet = {**_NAMED_PET, "gpsOnDefault": 1, "kippyID": 1}
+    coordinator = make_coordinator({"pets": [pet]})
     switch = KippyGpsDefaultSwitch(coordinator, pet)
-    switch.async_write_ha_state = MagicMock()
+    _silence_write(switch)
     assert switch.is_on
     await switch.async_turn_off()
     await switch.async_turn_on()
@@ -266,193 +290,136 @@ async def test_gps_switch_calls_api() -> None:
     )
 
 
-@pytest.mark.asyncio
-async def test_energy_saving_switch_api_error() -> None:
+@SESSION_LOOP
+async def test_energy_saving_switch_api_error(
+    energy_switch: Callable[..., tuple[KippyEnergySavingSwitch, Mock]],
+) -> None:
     """Errors from API propagate for energy saving switch."""
 
-    pet = {"petID": "1", "energySavingMode": 0, "kippyID": 1}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    coordinator.api.modify_kippy_settings = AsyncMock(side_effect=RuntimeError)
-    map_coordinator = MagicMock()
-    map_coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    switch = KippyEnergySavingSwitch(coordinator, pet, map_coordinator)
-    switch.async_write_ha_state = MagicMock()
+    pet = {**_ENERGY_SAVING_PET, "kippyID": 1}
+    switch, coordinator = energy_switch(pet)
+    coordinator.api.modify_kippy_settings = _raise_runtime
     with pytest.raises(RuntimeError):
         await switch.async_turn_on()
     assert pet["energySavingMode"] == 0
     switch.async_write_ha_state.assert_not_called()
 
 
-@pytest.mark.asyncio
-async def test_gps_switch_api_error() -> None:
+@SESSION_LOOP
+async def test_gps_switch_api_error(make_coordinator: Callable[..., Mock]) -> None:
     """Errors from API propagate for GPS activation switch."""
 
-    pet = {"petID": 1, "gpsOnDefault": 1, "kippyID": 1}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    coordinator.api.modify_kippy_settings = AsyncMock(side_effect=RuntimeError)
+    pet = {**_BASE_PET, "gpsOnDefault": 1, "kippyID": 1}
+    coordinator = make_coordinator({"pets": [pet]})
+    coordinator.api.modify_kippy_settings = _raise_runtime
     switch = KippyGpsDefaultSwitch(coordinator, pet)
-    switch.async_write_ha_state = MagicMock()
+    write = _silence_write(switch)
     with pytest.raises(RuntimeError):
         await switch.async_turn_off()
     assert pet["gpsOnDefault"] == 1
-    switch.async_write_ha_state.assert_not_called()
+    write.assert_not_called()
 
 
-@pytest.mark.asyncio
-async def test_energy_saving_switch_no_kippy_id() -> None:
+@SESSION_LOOP
+async def test_energy_saving_switch_no_kippy_id(
+    energy_switch: Callable[..., tuple[KippyEnergySavingSwitch, Mock]],
+) -> None:
     """Switch updates local state without API when kippy ID missing."""
 
-    pet = {"petID": "1", "energySavingMode": 0}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    coordinator.api.modify_kippy_settings = AsyncMock()
-    map_coordinator = MagicMock()
-    map_coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    switch = KippyEnergySavingSwitch(coordinator, pet, map_coordinator)
-    switch.async_write_ha_state = MagicMock()
+    pet = _ENERGY_SAVING_PET.copy()
+    switch, coordinator = energy_switch(pet)
     await switch.async_turn_on()
     assert pet["energySavingMode"] == 1
     coordinator.api.modify_kippy_settings.assert_not_called()
     switch.async_write_ha_state.assert_called_once()
 
 
-@pytest.mark.asyncio
-async def test_gps_switch_no_kippy_id() -> None:
+@SESSION_LOOP
+async def test_gps_switch_no_kippy_id(make_coordinator: Callable[..., Mock]) -> None:
     """GPS activation switch toggles without API when kippy ID missing."""
 
-    pet = {"petID": 1, "gpsOnDefault": 0}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    coordinator.api.modify_kippy_settings = AsyncMock()
+    pet = {**_BASE_PET, "gpsOnDefault": 0}
+    coordinator = make_coordinator({"pets": [pet]})
     switch = KippyGpsDefaultSwitch(coordinator, pet)
-    switch.async_write_ha_state = MagicMock()
+    write = _silence_write(switch)
     await switch.async_turn_on()
     assert pet["gpsOnDefault"] == 1
     coordinator.api.modify_kippy_settings.assert_not_called()
-    switch.async_write_ha_state.assert_called_once()
+    write.assert_called_once()
 
 
 def test_gps_switch_handle_coordinator_update() -> None:
     """_handle_coordinator_update refreshes pet data."""
 
-    pet = {"petID": 1, "gpsOnDefault": 1}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [{"petID": 1, "gpsOnDefault": 0}]}
-    coordinator.async_add_listener = MagicMock(return_value=MagicMock())
+    pet = {**_BASE_PET, "gpsOnDefault": 1}
+    coordinator = SimpleNamespace(data={"pets": [{**_BASE_PET, "gpsOnDefault": 0}]})
     switch = KippyGpsDefaultSwitch(coordinator, pet)
-    switch.async_write_ha_state = MagicMock()
+    write = _silence_write(switch)
     switch._handle_coordinator_update()
     assert not switch.is_on
-    switch.async_write_ha_state.assert_called_once()
-
-
-@pytest.mark.asyncio
-async def test_switch_async_setup_entry_creates_entities() -> None:
-    """async_setup_entry adds all switch entities for each pet."""
-    hass = MagicMock()
-    entry = MagicMock()
-    entry.entry_id = "1"
-    base_coordinator = MagicMock()
-    base_coordinator.data = {"pets": [{"petID": 1}]}
-    map_coordinator = MagicMock()
-    hass.data = {
-        DOMAIN: {
-            entry.entry_id: {
-                "coordinator": base_coordinator,
-                "map_coordinators": {1: map_coordinator},
+    write.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    ("pets", "with_map", "expected"),
+    [
+        pytest.param(
+            [_BASE_PET],
+            True,
+            [
+                KippyEnergySavingSwitch,
+                KippyLiveTrackingSwitch,
+                KippyIgnoreLBSSwitch,
+                KippyGpsDefaultSwitch,
+            ],
+            id="creates_entities",
+        ),
+        pytest.param([], False, [], id="no_pets"),
+        pytest.param([{**_BASE_PET, "expired_days": 0}], False, [], id="expired_pet"),
+        pytest.param([_BASE_PET], False, [KippyGpsDefaultSwitch], id="missing_map"),
+    ],
+)
+@SESSION_LOOP
+async def test_switch_async_setup_entry(
+    make_coordinator: Callable[..., Mock],
+    pets: list[dict[str, Any]],
+    with_map: bool,
+    expected: list[type],
+) -> None:
+    """async_setup_entry adds the switches each pet and its map coordinator allow."""
+    entry = SimpleNamespace(entry_id="1")
+    base_coordinator = make_coordinator({"pets": [pet.copy() for pet in pets]})
+    map_coordinators = (
+        {1: make_coordinator(spec=KippyMapDataUpdateCoordinator)} if with_map else {}
+    )
+    hass = SimpleNamespace(
+        data={
+            DOMAIN: {
+                entry.entry_id: {
+                    "coordinator": base_coordinator,
+                    "map_coordinators": map_coordinators,
+                }
             }
         }
-    }
-    async_add_entities = MagicMock()
-    await async_setup_entry(hass, entry, async_add_entities)
-    async_add_entities.assert_called_once()
-    entities = async_add_entities.call_args[0][0]
-    assert any(isinstance(e, KippyEnergySavingSwitch) for e in entities)
-    assert any(isinstance(e, KippyLiveTrackingSwitch) for e in entities)
-    assert any(isinstance(e, KippyIgnoreLBSSwitch) for e in entities)
-    assert any(isinstance(e, KippyGpsDefaultSwitch) for e in entities)
-
-
-@pytest.mark.asyncio
-async def test_switch_async_setup_entry_no_pets() -> None:
-    """No switches added when there are no pets."""
-    hass = MagicMock()
-    entry = MagicMock()
-    entry.entry_id = "1"
-    base_coordinator = MagicMock()
-    base_coordinator.data = {"pets": []}
-    hass.data = {
-        DOMAIN: {
-            entry.entry_id: {"coordinator": base_coordinator, "map_coordinators": {}}
-        }
-    }
-    async_add_entities = MagicMock()
-    await async_setup_entry(hass, entry, async_add_entities)
-    async_add_entities.assert_called_once_with([])
-
-
-@pytest.mark.asyncio
-async def test_switch_async_setup_entry_expired_pet() -> None:
-    """Expired pets should not create switch entities."""
-    hass = MagicMock()
-    entry = MagicMock()
-    entry.entry_id = "1"
-    base_coordinator = MagicMock()
-    base_coordinator.data = {"pets": [{"petID": 1, "expired_days": 0}]}
-    hass.data = {
-        DOMAIN: {
-            entry.entry_id: {"coordinator": base_coordinator, "map_coordinators": {}}
-        }
-    }
-    async_add_entities = MagicMock()
-    await async_setup_entry(hass, entry, async_add_entities)
-    async_add_entities.assert_called_once_with([])
-
-
-@pytest.mark.asyncio
-async def test_switch_async_setup_entry_missing_map() -> None:
-    """No switches added when map coordinator is missing."""
-    hass = MagicMock()
-    entry = MagicMock()
-    entry.entry_id = "1"
-    base_coordinator = MagicMock()
-    base_coordinator.data = {"pets": [{"petID": 1}]}
-    hass.data = {
-        DOMAIN: {
-            entry.entry_id: {"coordinator": base_coordinator, "map_coordinators": {}}
-        }
-    }
-    async_add_entities = MagicMock()
+    )
+    async_add_entities = Mock()
     await async_setup_entry(hass, entry, async_add_entities)
     async_add_entities.assert_called_once()
     entities = async_add_entities.call_args[0][0]
-    assert len(entities) == 1
-    assert isinstance(entities[0], KippyGpsDefaultSwitch)
+    assert Counter(type(e) for e in entities) == Counter(expected)
 
 
-def test_energy_saving_switch_turn_on_off_and_device_info() -> None:
+@SESSION_LOOP
+async def test_energy_saving_switch_turn_on_off_and_device_info(
+    energy_switch: Callable[..., tuple[KippyEnergySavingSwitch, Mock]],
+) -> None:
     """Energy saving switch toggles pet data and exposes device info."""
-    pet = {"petID": "1", "petName": "Rex", "energySavingMode": 0, "kippyID": 1}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    coordinator.api.modify_kippy_settings = AsyncMock()
-    map_coord = MagicMock()
-    map_coord.async_add_listener = MagicMock(return_value=MagicMock())
-    map_coord.data = {}
-    switch = KippyEnergySavingSwitch(coordinator, pet, map_coord)
-    switch.async_write_ha_state = MagicMock()
+    pet = {**_ENERGY_SAVING_PET, "petName": "Rex", "kippyID": 1}
+    switch, coordinator = energy_switch(pet, {})
     assert not switch.is_on
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(switch.async_turn_on())
+    await switch.async_turn_on()
     assert switch.is_on
-    loop.run_until_complete(switch.async_turn_off())
+    await switch.async_turn_off()
     assert not switch.is_on
     coordinator.data = {
         "pets": [{"petID": "1", "petName": "Rex", "energySavingMode": 1}]
@@ -464,29 +431,21 @@ def test_energy_saving_switch_turn_on_off_and_device_info() -> None:
 
 def test_live_and_ignore_lbs_device_info() -> None:
     """Other switches expose device info correctly."""
-    pet = {"petID": 1, "petName": "Rex"}
-    map_coord = MagicMock()
-    map_coord.data = {}
-    map_coord.async_add_listener = MagicMock()
+    pet = _NAMED_PET.copy()
+    map_coord = SimpleNamespace(data={})
     live = KippyLiveTrackingSwitch(map_coord, pet)
     ignore = KippyIgnoreLBSSwitch(map_coord, pet)
     assert live.device_info["name"] == "Kippy Rex"
     assert ignore.device_info["name"] == "Kippy Rex"
 
 
-def test_energy_saving_switch_handle_map_update_no_data() -> None:
+def test_energy_saving_switch_handle_map_update_no_data(
+    energy_switch: Callable[..., tuple[KippyEnergySavingSwitch, Mock]],
+) -> None:
     """Map updates without data are ignored."""
 
-    pet = {"petID": 1, "energySavingMode": 0}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock(return_value=MagicMock())
-    coordinator.async_set_updated_data = MagicMock()
-    map_coord = MagicMock()
-    map_coord.data = {}
-    map_coord.async_add_listener = MagicMock(return_value=MagicMock())
-    switch = KippyEnergySavingSwitch(coordinator, pet, map_coord)
-    switch.async_write_ha_state = MagicMock()
+    pet = {**_BASE_PET, "energySavingMode": 0}
+    switch, coordinator = energy_switch(pet, {})
 
     switch._handle_map_update()
 
@@ -494,38 +453,34 @@ def test_energy_saving_switch_handle_map_update_no_data() -> None:
     coordinator.async_set_updated_data.assert_not_called()
 
 
-def test_switches_raise_for_sync_methods() -> None:
+def test_switches_raise_for_sync_methods(
+    make_coordinator: Callable[..., Mock],
+) -> None:
     """Synchronous switch methods are not supported."""
 
-    pet = {"petID": 1}
-    coordinator = MagicMock()
-    coordinator.data = {"pets": [pet]}
-    coordinator.async_add_listener = MagicMock(return_value=MagicMock())
+    coordinator = make_coordinator({"pets": [_BASE_PET.copy()]})
 
-    gps = KippyGpsDefaultSwitch(coordinator, pet.copy())
+    gps = KippyGpsDefaultSwitch(coordinator, _BASE_PET.copy())
     with pytest.raises(NotImplementedError):
         gps.turn_on()
     with pytest.raises(NotImplementedError):
         gps.turn_off()
 
-    map_coord = MagicMock()
-    map_coord.async_add_listener = MagicMock(return_value=MagicMock())
-    energy = KippyEnergySavingSwitch(coordinator, pet.copy(), map_coord)
+    map_coord = make_coordinator(spec=KippyMapDataUpdateCoordinator)
+    energy = KippyEnergySavingSwitch(coordinator, _BASE_PET.copy(), map_coord)
     with pytest.raises(NotImplementedError):
         energy.turn_on()
     with pytest.raises(NotImplementedError):
         energy.turn_off()
 
-    map_coord2 = MagicMock()
-    map_coord2.data = {}
-    map_coord2.async_add_listener = MagicMock(return_value=MagicMock())
-    live = KippyLiveTrackingSwitch(map_coord2, pet.copy())
+    map_coord2 = make_coordinator({}, spec=KippyMapDataUpdateCoordinator)
+    live = KippyLiveTrackingSwitch(map_coord2, _BASE_PET.copy())
     with pytest.raises(NotImplementedError):
         live.turn_on()
     with pytest.raises(NotImplementedError):
         live.turn_off()
 
-    ignore = KippyIgnoreLBSSwitch(map_coord2, pet.copy())
+    ignore = KippyIgnoreLBSSwitch(map_coord2, _BASE_PET.copy())
     with pytest.raises(NotImplementedError):
         ignore.turn_on()
     with pytest.raises(NotImplementedError):